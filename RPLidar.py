@@ -5,21 +5,26 @@ Uso:
   python RPLidar.py off            # apaga (detiene el motor)
   python RPLidar.py status         # muestra info / salud
   python RPLidar.py scan           # muestra datos en vivo dentro del área de paneles
+  python RPLidar.py compile        # compila los kernels Numba a la caché (sin sensor)
   python RPLidar.py                # solicita acción en terminal
 Requiere: pip install rplidar matplotlib numpy
+Opcional: pip install numba              (acelera la conversión de cada vuelta)
+          pip install vispy              (vista OpenGL con --backend gl o --gl)
+          pip install pyqtgraph PyQt5    (vista Qt con --backend pyqtgraph)
 """
 import sys
+import os
 import argparse
 import time
 import math
 import threading
+import queue
+from bisect import bisect_left, bisect_right
 from collections import deque
+from itertools import chain
 
 import numpy as np
 from rplidar import RPLidar, RPLidarException
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-from matplotlib.patches import Circle
 import ctypes
 
 PORT = 'COM3'
@@ -36,61 +41,148 @@ PANELS_Y = 1
 # Buffer máximo de puntos para que la interfaz sea fluida
 POINT_BUFFER = 8000
 
+# Tope de cuadros por segundo del gráfico (las vueltas intermedias sólo alimentan el buffer)
+MAX_FPS = 30.0
+
+# Tablas de coseno/seno con la resolución nativa del sensor, 1/64° (el ángulo llega en punto
+# fijo Q6): todo ángulo medido es k/64 exacto, así que ángulo * 64 es el índice sin redondeo
+_ANGLE_BIN_DEG = 1.0 / 64.0
+_ANGLE_BINS = int(round(360 / _ANGLE_BIN_DEG))
+_COS_LUT = np.cos(np.deg2rad(np.arange(_ANGLE_BINS) * _ANGLE_BIN_DEG)).astype(np.float32)
+_SIN_LUT = np.sin(np.deg2rad(np.arange(_ANGLE_BINS) * _ANGLE_BIN_DEG)).astype(np.float32)
+
+# Radio de agrupamiento de puntos en clusters (20 cm)
+CLUSTER_RADIUS_M = 0.20
+
+# Máximo de vueltas encoladas que se juntan en un lote (~0.8 s a 10 Hz); si se acumularon más
+# (la GUI estuvo bloqueada), las más viejas se descartan
+MAX_COALESCE_SCANS = 8
+
+# Protocolo serie del RPLidar (modo SCAN estándar): cada medición es un nodo de 5 bytes
+_CMD_STOP = b'\xA5\x25'
+_CMD_SCAN = b'\xA5\x20'
+_SCAN_DESCRIPTOR = b'\xA5\x5A\x05\x00\x00\x40\x81'
+_NODE_BYTES = 5
+# vista estructurada de un nodo: byte 0 (calidad | !S | S), bytes 1-2 (ángulo_q6 << 1 | C) y
+# bytes 3-4 (distancia_q2), ambos enteros little-endian; evita recomponerlos con shifts
+_NODE_DTYPE = np.dtype([('b0', 'u1'), ('angle', '<u2'), ('dist', '<u2')])
+# nodos consecutivos válidos exigidos para dar por recuperada la alineación: el chequeo de cada
+# nodo es de sólo 2 bits (1/4 de falsos positivos), con 3 nodos queda en ~1/64
+_SYNC_LOOKAHEAD = 3
+# bytes pedidos por lectura (~400 nodos, del orden de una vuelta): pocas llamadas por segundo
+_SCAN_CHUNK_BYTES = _NODE_BYTES * 400
+
+# offsets vacíos reutilizables para el scatter (evita una asignación por cada frame sin clusters)
+_EMPTY_XY = np.empty((0, 2), dtype=np.float32)
+
 def connect(port, baud, timeout=1.0):
     """Crear objeto RPLidar con timeout y dejar tiempo para que el dispositivo se estabilice."""
     lidar = RPLidar(port, baudrate=baud, timeout=timeout)
     # permitir que el puerto se estabilice
     time.sleep(0.05)
-    # intentar limpiar buffer si existe pyserial
+    # reducir la latencia del adaptador USB-serie y limpiar buffer si existe pyserial
+    ser = _serial_of(lidar)
+    if ser is not None:
+        _set_low_latency(ser)
+    _flush_input(lidar)
+    return lidar
+
+def _set_low_latency(ser):
+    """Configurar el puerto para mínima latencia (best effort, errores ignorados).
+    Los adaptadores FTDI agrupan los bytes recibidos durante 'latency_timer' (16 ms por defecto),
+    lo que se ve como puntos atrasados respecto de la realidad."""
+    if sys.platform.startswith('linux'):
+        try:
+            # pyserial >= 3.0: ASYNC_LOW_LATENCY, que el driver ftdi_sio traduce a latency_timer = 1 ms
+            ser.set_low_latency_mode(True)
+        except (AttributeError, OSError, ValueError):
+            # fallback: escribir directamente el latency_timer en sysfs (requiere permisos)
+            tty = os.path.basename(os.path.realpath(ser.name))
+            try:
+                with open(f'/sys/bus/usb-serial/devices/{tty}/latency_timer', 'w') as f:
+                    f.write('1')
+            except OSError:
+                pass
+    # buffer del driver (pyserial sólo lo implementa en Windows): el hilo productor lo drena
+    # continuamente, así que sólo hace falta margen para que una pausa del proceso (GC, planificador)
+    # no pierda bytes; 64 KiB son ~2.5 s a 256000 baudios, sin llegar a acumular datos muy viejos
+    if hasattr(ser, 'set_buffer_size'):
+        try:
+            ser.set_buffer_size(rx_size=1 << 16, tx_size=1 << 14)
+        except Exception:
+            pass
+
+def _serial_of(lidar):
+    """Objeto pyserial de la conexión ('_serial' o '_serial_port' según la versión de rplidar)."""
     ser = getattr(lidar, '_serial', None)
+    if ser is None:
+        ser = getattr(lidar, '_serial_port', None)
+    return ser
+
+def _flush_input(lidar):
+    """Descartar lo pendiente en el buffer de entrada del puerto serie (si existe pyserial)."""
+    ser = _serial_of(lidar)
     if ser is not None:
         try:
             ser.reset_input_buffer()
         except AttributeError:
             try:
                 ser.flushInput()
-            except:
+            except Exception:
                 pass
-    return lidar
 
-def do_on(port, baud):
-    lidar = None
+def _safe_shutdown(lidar):
+    """Detener escaneo y motor y cerrar el puerto, ignorando errores de cada paso."""
+    for op in (lidar.stop, lidar.stop_motor, lidar.disconnect):
+        try:
+            op()
+        except Exception:
+            pass
+
+def do_on(port, baud, lidar=None):
+    """Arrancar el motor. Si se pasa 'lidar' se usa esa conexión y se deja abierta."""
+    own = lidar is None
     try:
-        lidar = connect(port, baud)
+        if own:
+            lidar = connect(port, baud)
         lidar.start_motor()
         print("Motor arrancado.")
     except RPLidarException as e:
         print("Error al conectar/arrancar:", e)
     finally:
-        if lidar:
+        if own and lidar:
             try:
                 lidar.disconnect()
-            except:
+            except Exception:
                 pass
 
-def do_off(port, baud):
-    lidar = None
+def do_off(port, baud, lidar=None):
+    """Detener escaneo y motor. Si se pasa 'lidar' se usa esa conexión y se deja abierta."""
+    own = lidar is None
     try:
-        lidar = connect(port, baud)
+        if own:
+            lidar = connect(port, baud)
         try:
             lidar.stop()
-        except:
+        except Exception:
             pass
         lidar.stop_motor()
         print("Motor detenido.")
     except RPLidarException as e:
         print("Error al conectar/detener:", e)
     finally:
-        if lidar:
+        if own and lidar:
             try:
                 lidar.disconnect()
-            except:
+            except Exception:
                 pass
 
-def do_status(port, baud):
-    lidar = None
+def do_status(port, baud, lidar=None):
+    """Mostrar info y salud. Si se pasa 'lidar' se usa esa conexión y se deja abierta."""
+    own = lidar is None
     try:
-        lidar = connect(port, baud)
+        if own:
+            lidar = connect(port, baud)
         info = lidar.get_info()
         health = lidar.get_health()
         print("Info:", info)
@@ -98,18 +190,35 @@ def do_status(port, baud):
     except RPLidarException as e:
         print("Error al obtener estado:", e)
     finally:
-        if lidar:
+        if own and lidar:
             try:
                 lidar.disconnect()
-            except:
+            except Exception:
                 pass
 
+def do_compile():
+    """Compilar los kernels Numba y guardarlos en la caché en disco (__pycache__ junto al script),
+    sin conectar el sensor. Pensado para correr una vez tras instalar o actualizar numba: así el
+    primer 'scan' sólo carga el código de máquina de la caché en lugar de compilarlo."""
+    t0 = time.perf_counter()
+    _warmup_kernels()
+    if _scan_to_xy_nb is None:
+        print("numba no disponible: se usa la conversión NumPy, no hay nada que compilar.")
+        return
+    print(f"Kernels Numba listos en {time.perf_counter() - t0:.2f} s.")
+
 def init_plot(panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS, panels_x=PANELS_X, panels_y=PANELS_Y,
-              origin_offset_panels_x=0, origin_offset_panels_y=0):
+              origin_offset_panels_x=0, origin_offset_panels_y=0, fine_grid=False):
     """Crear ventana gráfica mostrando solo paneles positivos en x,y (desde 0 hasta span).
     El eje Y está invertido para que el origen (0,0) quede en la esquina superior izquierda.
     origin_offset_panels_x/y: cantidad de paneles a desplazar la posición del RPLidar desde la
-    esquina superior izquierda (valores enteros, pueden ser 0)."""
+    esquina superior izquierda (valores enteros, pueden ser 0).
+    fine_grid: si es True, dibuja la subdivisión por píxel; si no, una subdivisión cada 1/8 de panel."""
+    # matplotlib se importa recién aquí: on/off/status no pagan su tiempo de carga (backend, fuentes)
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+    from matplotlib.collections import LineCollection
+
     # span total por eje calculado a partir del número de paneles
     span_x = panels_x * panel_size
     span_y = panels_y * panel_size
@@ -145,18 +254,40 @@ def init_plot(panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS, panels_x=PANEL
     ax.set_title('RPLidar - origen en esquina superior izquierda (0,0)')
     ax.set_aspect('equal', 'box')
 
-    # Major grid cada panel_size (panel), minor grid cada pixel (panel_size/panel_pixels)
+    # Major grid cada panel_size (panel), minor grid cada 1/8 de panel: una línea por píxel
+    # (panel_size/panel_pixels) son miles de líneas que no se distinguen en pantalla
     major = ticker.MultipleLocator(panel_size)
-    minor = ticker.MultipleLocator(panel_size / panel_pixels)
+    minor = ticker.MultipleLocator(panel_size / 8)
 
     ax.xaxis.set_major_locator(major)
     ax.yaxis.set_major_locator(major)
     ax.xaxis.set_minor_locator(minor)
     ax.yaxis.set_minor_locator(minor)
 
-    # Dibujar cuadricula: paneles bien visibles y subdivisión por píxeles
+    # Dibujar cuadricula: paneles bien visibles y subdivisión menor
     ax.grid(which='major', color='gray', linewidth=1.0)
-    ax.grid(which='minor', color='lightgray', linewidth=0.4, linestyle=':')
+    if fine_grid:
+        # la subdivisión por píxel sólo se distingue si las líneas quedan a >= 2 px de pantalla;
+        # más densa es un relleno gris que cuesta dibujar sin aportar nada
+        ax.apply_aspect()
+        screen_px = ax.get_window_extent().width / (panels_x * panel_pixels)
+        if screen_px < 2.0:
+            print(f"Grilla por píxel omitida: {screen_px:.2f} px de pantalla por píxel de panel "
+                  "(se usa la subdivisión cada 1/8 de panel).")
+            fine_grid = False
+    if fine_grid:
+        # subdivisión por píxel como un único LineCollection (un artista en lugar de una línea por tick)
+        step = panel_size / panel_pixels
+        gx = np.arange(1, panels_x * panel_pixels) * step
+        gy = np.arange(1, panels_y * panel_pixels) * step
+        vertical = np.stack([np.column_stack((gx, np.zeros_like(gx))),
+                             np.column_stack((gx, np.full_like(gx, span_y)))], axis=1)
+        horizontal = np.stack([np.column_stack((np.zeros_like(gy), gy)),
+                               np.column_stack((np.full_like(gy, span_x), gy))], axis=1)
+        ax.add_collection(LineCollection(np.concatenate((vertical, horizontal)),
+                                         colors='lightgray', linewidths=0.4, linestyles=':', zorder=0))
+    else:
+        ax.grid(which='minor', color='lightgray', linewidth=0.4, linestyle=':')
 
     # Marcar la posición del RPLidar en offset (m) desde la esquina superior izquierda
     ax.plot(offset_x_m, offset_y_m, marker='o', color='blue', markersize=8, label='RPLidar (offset)', zorder=10)
@@ -181,268 +312,1007 @@ def init_plot(panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS, panels_x=PANEL
     plt.show(block=False)
     return fig, ax
 
+def _scan_to_xy(scan, angle_min_deg, angle_max_deg, offset_x_m, offset_y_m, span_x, span_y):
+    """Convertir una vuelta completa (array (n, 3) [calidad, ángulo_deg, distancia_mm], o una
+    secuencia equivalente de tuplas) a coordenadas del plot, con operaciones vectorizadas.
+    Devuelve un array (k, 2) float32 con las coordenadas (x, y) en metros de los puntos que caen
+    dentro del rango angular y del cuadrante positivo [0, span]."""
+    arr = np.asarray(scan, dtype=np.float32).reshape(-1, 3)
+    angle_deg = arr[:, 1]
+    dist_mm = arr[:, 2]
+    # primero el filtro barato (ventana angular y distancia válida): la conversión sólo se hace
+    # para los puntos que sobreviven (con la ventana por defecto de 90° se descarta ~3/4 de la vuelta)
+    keep = (angle_deg >= angle_min_deg) & (angle_deg <= angle_max_deg) & (dist_mm != 0)
+    angle_deg = angle_deg[keep]
+    dist_mm = dist_mm[keep]
+    r = dist_mm * 1e-3  # metros
+    # coordenadas del plot (relativas al sensor + offset del sensor)
+    idx = (angle_deg * (1.0 / _ANGLE_BIN_DEG) + 0.5).astype(np.int32) % _ANGLE_BINS
+    x = r * _COS_LUT[idx] + offset_x_m
+    y = r * _SIN_LUT[idx] + offset_y_m
+    # conservar solo puntos dentro del cuadrante positivo [0, span]
+    inside = (x >= 0.0) & (x <= span_x) & (y >= 0.0) & (y <= span_y)
+    x = x[inside]
+    out = np.empty((len(x), 2), dtype=np.float32)
+    out[:, 0] = x
+    out[:, 1] = y[inside]
+    return out
+
+def _scan_to_xy_loop(scan_arr, amin, amax, offset_x_m, offset_y_m, span_x, span_y):
+    """Equivalente a _scan_to_xy como un único bucle escalar, para compilarlo con Numba:
+    filtro angular + polar->xy + filtro de cuadrante en una sola pasada. Sólo se usa compilado
+    (_scan_to_xy_nb)."""
+    out = np.empty((scan_arr.shape[0], 2), dtype=np.float32)
+    # todo en float32: una constante o argumento float64 promovería cada operación a float64
+    mm_to_m = np.float32(1e-3)
+    bins_per_deg = np.float32(1.0 / _ANGLE_BIN_DEG)
+    half = np.float32(0.5)
+    ox = np.float32(offset_x_m)
+    oy = np.float32(offset_y_m)
+    sx = np.float32(span_x)
+    sy = np.float32(span_y)
+    k = 0
+    for i in range(scan_arr.shape[0]):
+        angle_deg = scan_arr[i, 1]
+        dist_mm = scan_arr[i, 2]
+        if dist_mm == 0.0 or angle_deg < amin or angle_deg > amax:
+            continue
+        r = dist_mm * mm_to_m
+        idx = int(angle_deg * bins_per_deg + half) % _ANGLE_BINS
+        x = r * _COS_LUT[idx] + ox
+        y = r * _SIN_LUT[idx] + oy
+        if x < 0 or x > sx or y < 0 or y > sy:
+            continue
+        out[k, 0] = x
+        out[k, 1] = y
+        k += 1
+    return out[:k]
+
+# kernel compilado (nogil: corre en el hilo productor en paralelo con el dibujo); lo crea
+# _warmup_kernels() si numba está instalado, si no queda None y se usa la versión NumPy
+_scan_to_xy_nb = None
+# búsqueda del centro previo más cercano y agrupamiento compilados (misma carga perezosa que
+# _scan_to_xy_nb)
+_nearest_dist_nb = None
+_cluster_nb = None
+_kernels_loaded = False
+
+def _convert_scan(scan_arr, angle_min_deg, angle_max_deg, offset_x_m, offset_y_m, span_x, span_y):
+    """Convertir una vuelta a un array (k, 2) float32 de coordenadas del plot, con el kernel Numba
+    si está disponible; si no, con NumPy."""
+    if _scan_to_xy_nb is not None:
+        return _scan_to_xy_nb(scan_arr, float(angle_min_deg), float(angle_max_deg),
+                              float(offset_x_m), float(offset_y_m), float(span_x), float(span_y))
+    return _scan_to_xy(scan_arr, angle_min_deg, angle_max_deg,
+                       offset_x_m, offset_y_m, span_x, span_y)
+
+def _nearest_dist_loop(prev_centers, centers):
+    """Distancia de cada centro actual al centro previo más cercano, como doble bucle escalar
+    para compilarlo con Numba (sin el array temporal (K, P, 2) de la versión NumPy)."""
+    out = np.empty(centers.shape[0], dtype=np.float32)
+    for i in range(centers.shape[0]):
+        cx = centers[i, 0]
+        cy = centers[i, 1]
+        best = np.float32(np.inf)
+        for j in range(prev_centers.shape[0]):
+            dx = prev_centers[j, 0] - cx
+            dy = prev_centers[j, 1] - cy
+            d2 = dx * dx + dy * dy
+            if d2 < best:
+                best = d2
+        out[i] = np.sqrt(best)
+    return out
+
+def _nearest_distances(prev_centers, centers):
+    """Para cada fila de centers (K, 2), la distancia al más cercano de prev_centers (P, 2).
+    Con el kernel Numba si está disponible; si no, con NumPy (|c|² + |p|² - 2·c·p en float64)."""
+    if _nearest_dist_nb is not None:
+        return _nearest_dist_nb(prev_centers, centers)
+    c = centers.astype(np.float64)
+    p = prev_centers.astype(np.float64)
+    d2 = np.einsum('ij,ij->i', c, c)[:, None] + np.einsum('ij,ij->i', p, p)[None, :] - 2.0 * (c @ p.T)
+    return np.sqrt(np.maximum(d2.min(axis=1), 0.0))
+
+def _warmup_kernels():
+    """Importar numba y compilar (o cargar de la caché) los kernels antes de la primera vuelta.
+    Sin numba, o si no compilan, se usa la versión NumPy. Sólo la primera llamada hace trabajo."""
+    global _scan_to_xy_nb, _nearest_dist_nb, _cluster_nb, _kernels_loaded
+    if _kernels_loaded:
+        return
+    _kernels_loaded = True
+    try:
+        from numba import njit
+    except ImportError:  # numba es opcional: sin él se usa la conversión NumPy
+        return
+    try:
+        kernel = njit(cache=True, fastmath=True, nogil=True)(_scan_to_xy_loop)
+        kernel(np.zeros((1, 3), dtype=np.float32), 0.0, 90.0, 0.0, 0.0, 1.0, 1.0)
+        nearest = njit(cache=True, fastmath=True)(_nearest_dist_loop)
+        nearest(_EMPTY_XY, _EMPTY_XY)
+        cluster = njit(cache=True)(_cluster_loop)
+        cluster(np.zeros((1, 2), dtype=np.float32), 0.2)
+    except Exception as e:
+        print("Kernel Numba no disponible, se usa NumPy:", e)
+        return
+    _scan_to_xy_nb = kernel
+    _nearest_dist_nb = nearest
+    _cluster_nb = cluster
+
+class PointBuffer:
+    """Buffer circular de puntos preasignado: un array (capacidad, 2) float32 con filas (x, y).
+    Al llenarse sobrescribe los más antiguos. El timestamp se guarda una vez por lote y la
+    región vigente es [tail, total) en posiciones absolutas; el TTL sólo mueve tail."""
+
+    def __init__(self, capacity):
+        self._n = int(capacity)
+        self._xy = np.empty((self._n, 2), dtype=np.float32)
+        self._unwrapped = np.empty_like(self._xy)  # destino de live() cuando la región cruza el final
+        self._head = 0   # próxima posición de escritura (= total % capacidad)
+        self._total = 0  # posición absoluta de fin: puntos escritos desde el inicio
+        self._tail = 0   # posición absoluta del punto vigente más antiguo
+        # timestamp y posición absoluta de fin de cada lote; los vigentes empiezan en _b0
+        self._batch_t = []
+        self._batch_end = []
+        self._b0 = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def state(self):
+        """Firma barata del contenido: cambia sólo si se agregaron o descartaron puntos."""
+        return (self._total, self._tail)
+
+    @property
+    def _count(self):
+        """Puntos vigentes, los últimos 'count' antes de head (<= capacidad)."""
+        return self._total - self._tail
+
+    def _commit(self, t, k):
+        """Registrar un lote de k puntos recién escritos con timestamp t."""
+        if k == 0:
+            return
+        self._total += k
+        self._batch_t.append(t)
+        self._batch_end.append(self._total)
+        if self._total - self._tail > self._n:
+            # los lotes más antiguos quedaron (total o parcialmente) sobrescritos
+            self._tail = self._total - self._n
+            self._b0 = bisect_right(self._batch_end, self._tail, self._b0)
+            self._compact()
+
+    def _compact(self):
+        """Descartar de las listas de lotes los ya vencidos, cada tanto (costo amortizado O(1))."""
+        if self._b0 >= 64 and 2 * self._b0 >= len(self._batch_t):
+            del self._batch_t[:self._b0]
+            del self._batch_end[:self._b0]
+            self._b0 = 0
+
+    def extend(self, t, xy):
+        """Agregar un lote de puntos (array (k, 2) float32) con timestamp común t."""
+        n = self._n
+        k = len(xy)
+        if k == 0:
+            return
+        if k > n:
+            # sólo caben los n más recientes
+            xy, k = xy[-n:], n
+        head = self._head
+        end = head + k
+        if end <= n:
+            self._xy[head:end] = xy
+        else:
+            # el lote cruza el final del buffer: escribir en dos segmentos
+            first = n - head
+            self._xy[head:] = xy[:first]
+            self._xy[:k - first] = xy[first:]
+        self._head = end % n
+        self._commit(t, k)
+
+    def purge(self, cutoff):
+        """Descartar los lotes con timestamp < cutoff (avanza el extremo antiguo, sin copiar)."""
+        i = bisect_left(self._batch_t, cutoff, self._b0)
+        if i > self._b0:
+            self._tail = max(self._tail, self._batch_end[i - 1])
+            self._b0 = i
+            self._compact()
+
+    def live(self, cutoff=None):
+        """Purgar por TTL (si cutoff no es None) y devolver un array (N, 2) con los puntos vigentes
+        en orden cronológico.
+        Es una vista del buffer o, si la región vigente cruza el final, del buffer auxiliar
+        preasignado: sin asignaciones por cuadro, pero sólo es válido hasta la próxima escritura."""
+        if cutoff is not None:
+            self.purge(cutoff)
+        head = self._head
+        start = head - self._count
+        if start >= 0:
+            return self._xy[start:head]
+        out = self._unwrapped[:self._count]
+        np.concatenate((self._xy[start:], self._xy[:head]), out=out)
+        return out
+
+def _scan_list_to_array(scan):
+    """Convertir una vuelta de lidar.iter_scans() (lista de tuplas (calidad, ángulo, distancia))
+    a un array (n, 3) float32."""
+    return np.fromiter(chain.from_iterable(scan), dtype=np.float32,
+                       count=3 * len(scan)).reshape(-1, 3)
+
+def _decode_nodes(raw):
+    """Decodificar nodos SCAN de 5 bytes con operaciones vectorizadas.
+    Devuelve (array (n, 3) float32 con calidad, ángulo en grados y distancia en mm,
+    flags de inicio de vuelta, máscara de nodos válidos según los bits de control)."""
+    nodes = np.frombuffer(raw, dtype=_NODE_DTYPE)
+    b0 = nodes['b0']
+    angle = nodes['angle']
+    start = (b0 & 1).astype(bool)
+    # S y !S deben diferir y el bit de chequeo C (bit 0 del campo de ángulo) vale siempre 1:
+    # los dos chequeos en una sola expresión de bits, como en _find_sync
+    valid = ((b0 ^ (b0 >> 1)) & angle & 1).astype(bool)
+    out = np.empty((len(nodes), 3), dtype=np.float32)
+    out[:, 0] = b0 >> 2
+    out[:, 1] = (angle >> 1) * np.float32(1.0 / 64.0)
+    out[:, 2] = nodes['dist'] * np.float32(0.25)
+    return out, start, valid
+
+def _find_sync(buf, lookahead=_SYNC_LOOKAHEAD):
+    """Primer offset de 'buf' donde empiezan 'lookahead' nodos consecutivos que pasan los bits de
+    control (S != !S y C == 1), o None si no hay ninguno completo en el bloque."""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    n = len(b) - _NODE_BYTES * lookahead + 1  # offsets con 'lookahead' nodos completos por delante
+    if n <= 0:
+        return None
+    # ok[p]: un nodo que empieza en el byte p pasaría el chequeo
+    ok = (((b[:-1] ^ (b[:-1] >> 1)) & b[1:] & 1) == 1)
+    cand = ok[:n].copy()
+    for k in range(1, lookahead):
+        cand &= ok[k * _NODE_BYTES:k * _NODE_BYTES + n]
+    idx = np.flatnonzero(cand)
+    return int(idx[0]) if len(idx) else None
+
+def iter_scans_fast(lidar, chunk_bytes=_SCAN_CHUNK_BYTES, min_len=5, stats=None, stopped=None):
+    """Alternativa a lidar.iter_scans(): lee el puerto serie en bloques y decodifica los nodos con
+    NumPy, sin crear una tupla Python por medición. Produce una vuelta por iteración como
+    array (n, 3) float32 [calidad, ángulo_deg, distancia_mm].
+    Si el flujo pierde la alineación de 5 bytes se conservan los nodos válidos previos y se avanza
+    byte a byte (vectorizado) hasta el próximo punto donde vuelven a validar, sin vaciar el buffer
+    ni descartar el resto del bloque.
+    stats: dict opcional donde se acumulan 'dropped_bytes' y 'resyncs'.
+    stopped: función opcional que se consulta tras cada lectura del puerto; si devuelve True el
+    generador termina aunque la vuelta esté incompleta (con el puerto en silencio cada lectura
+    vuelve vacía al vencer el timeout y no se completaría nunca)."""
+    ser = _serial_of(lidar)
+    if ser is None:
+        raise RPLidarException("No se encontró el puerto serie de la conexión")
+    if stats is None:
+        stats = {}
+    stats.setdefault('dropped_bytes', 0)
+    stats.setdefault('resyncs', 0)
+    # detener un escaneo previo y arrancar uno nuevo desde un buffer limpio
+    ser.write(_CMD_STOP)
+    time.sleep(0.01)
+    _flush_input(lidar)
+    ser.write(_CMD_SCAN)
+    descriptor = ser.read(len(_SCAN_DESCRIPTOR))
+    if descriptor != _SCAN_DESCRIPTOR:
+        raise RPLidarException("Descriptor de SCAN inesperado: %r" % (descriptor,))
+    carry = b''
+    parts = []  # nodos de la vuelta en curso
+    while True:
+        data = carry + ser.read(max(ser.in_waiting, chunk_bytes))
+        if stopped is not None and stopped():
+            return
+        pos = 0
+        decoded = []  # segmentos (nodos, flags de inicio) alineados de este bloque
+        while True:
+            usable = pos + (len(data) - pos) // _NODE_BYTES * _NODE_BYTES
+            if usable == pos:
+                break
+            nodes, start, valid = _decode_nodes(data[pos:usable])
+            bad = np.flatnonzero(~valid)
+            if not len(bad):
+                decoded.append((nodes, start))
+                pos = usable
+                break
+            # conservar los nodos válidos hasta el primer error y buscar la nueva alineación
+            good = int(bad[0])
+            if good:
+                decoded.append((nodes[:good], start[:good]))
+            lost = pos + good * _NODE_BYTES
+            off = _find_sync(data[lost + 1:])
+            if off is None:
+                # todavía no se puede confirmar: guardar la cola para juntarla con la próxima lectura
+                pos = max(lost + 1, len(data) - _NODE_BYTES * _SYNC_LOOKAHEAD)
+                stats['dropped_bytes'] += pos - lost
+                break
+            pos = lost + 1 + off
+            stats['dropped_bytes'] += pos - lost
+            stats['resyncs'] += 1
+        carry = data[pos:]
+        for nodes, start in decoded:
+            prev = 0
+            for i in np.flatnonzero(start):
+                parts.append(nodes[prev:i])
+                scan = np.concatenate(parts)
+                parts = []
+                if len(scan) > min_len:
+                    yield scan
+                prev = i
+            parts.append(nodes[prev:])
+
+def _rasterize(density, points_arr, px_per_m):
+    """Acumular en 'density' (uint16, filas = y, columnas = x) los conteos por píxel de panel de
+    los puntos (en metros, dentro de [0, span]). Las celdas se apagan a la mitad en cada cuadro y
+    quedan en max(valor apagado, conteo actual). Devuelve True si alguna sigue apagándose."""
+    rows, cols = density.shape
+    ix = (points_arr[:, 0] * px_per_m).astype(np.intp)
+    iy = (points_arr[:, 1] * px_per_m).astype(np.intp)
+    # x == span (borde derecho/inferior) cae en el último píxel, como en histogram2d
+    np.minimum(ix, cols - 1, out=ix)
+    np.minimum(iy, rows - 1, out=iy)
+    cells, counts = np.unique(iy * cols + ix, return_counts=True)
+    np.minimum(counts, 65535, out=counts)
+    flat = density.reshape(-1)
+    flat >>= 1
+    flat[cells] = np.maximum(flat[cells], counts)
+    # density >= conteo en todas las celdas: difieren en alguna sólo si las sumas difieren
+    return int(flat.sum(dtype=np.uint64)) > int(counts.sum())
+
+def _cluster_points(points_arr, radius, max_points=None):
+    """Agrupa puntos por distancia: devuelve centros (float32) y cuentas.
+    Los puntos se acumulan en una grilla de celdas de radius/2 y las celdas se agrupan con el
+    algoritmo greedy, con su cantidad de puntos como peso.
+    max_points: si hay más puntos, se toma uno de cada ceil(len / max_points) (a lo sumo
+    max_points) y las cuentas se reescalan por ese paso."""
+    if points_arr.size == 0:
+        return _EMPTY_XY, np.empty((0,), dtype=int)
+    stride = 1
+    if max_points and len(points_arr) > max_points:
+        stride = -(-len(points_arr) // max_points)
+        # copia contigua: el kernel está compilado para arrays C-contiguos y una vista con paso
+        # dispararía otra compilación (layout 'A') en el hilo de la GUI en el primer cuadro
+        points_arr = np.ascontiguousarray(points_arr[::stride])
+    if _cluster_nb is not None:
+        centers, counts = _cluster_nb(points_arr, float(radius))
+        return centers, counts * stride
+    cell = radius * 0.5
+    # los puntos ya están dentro de [0, span]: los índices de celda son no negativos
+    ix = (points_arr[:, 0] * (1.0 / cell)).astype(np.intp)
+    iy = (points_arr[:, 1] * (1.0 / cell)).astype(np.intp)
+    key = iy * (int(ix.max()) + 1) + ix
+    cell_n = np.bincount(key)
+    occupied = np.flatnonzero(cell_n)
+    cell_n = cell_n[occupied]
+    cell_sx = np.bincount(key, weights=points_arr[:, 0])[occupied]
+    cell_sy = np.bincount(key, weights=points_arr[:, 1])[occupied]
+
+    clusters = []  # cada cluster: [sum_x, sum_y, count]
+    r2 = radius * radius
+    for sx, sy, n in zip(cell_sx.tolist(), cell_sy.tolist(), cell_n.tolist()):
+        x = sx / n
+        y = sy / n
+        placed = False
+        for c in clusters:
+            cx = c[0] / c[2]
+            cy = c[1] / c[2]
+            if (x - cx) * (x - cx) + (y - cy) * (y - cy) <= r2:
+                c[0] += sx
+                c[1] += sy
+                c[2] += n
+                placed = True
+                break
+        if not placed:
+            clusters.append([sx, sy, n])
+    centers = np.array([[c[0] / c[2], c[1] / c[2]] for c in clusters], dtype=np.float32)
+    counts = np.array([c[2] for c in clusters], dtype=int) * stride
+    return centers, counts
+
+def _cluster_loop(points_arr, radius):
+    """Equivalente a _cluster_points (sin submuestreo) con bucles escalares, para compilarlo
+    con Numba. Sólo se usa compilado (_cluster_nb)."""
+    n = points_arr.shape[0]
+    inv_cell = np.float32(2.0 / radius)
+    # dimensiones de la grilla: los puntos ya están dentro de [0, span]
+    nx = 1
+    ny = 1
+    for i in range(n):
+        ix = int(points_arr[i, 0] * inv_cell)
+        iy = int(points_arr[i, 1] * inv_cell)
+        if ix >= nx:
+            nx = ix + 1
+        if iy >= ny:
+            ny = iy + 1
+    cell_n = np.zeros(nx * ny, dtype=np.int64)
+    cell_sx = np.zeros(nx * ny, dtype=np.float64)
+    cell_sy = np.zeros(nx * ny, dtype=np.float64)
+    for i in range(n):
+        x = points_arr[i, 0]
+        y = points_arr[i, 1]
+        key = int(y * inv_cell) * nx + int(x * inv_cell)
+        cell_n[key] += 1
+        cell_sx[key] += x
+        cell_sy[key] += y
+    # greedy sobre las celdas ocupadas, en el mismo orden (clave creciente) que la versión NumPy
+    sum_x = np.empty(n, dtype=np.float64)
+    sum_y = np.empty(n, dtype=np.float64)
+    cnt = np.empty(n, dtype=np.int64)
+    k = 0
+    r2 = radius * radius
+    for key in range(nx * ny):
+        m = cell_n[key]
+        if m == 0:
+            continue
+        x = cell_sx[key] / m
+        y = cell_sy[key] / m
+        placed = False
+        for j in range(k):
+            dx = x - sum_x[j] / cnt[j]
+            dy = y - sum_y[j] / cnt[j]
+            if dx * dx + dy * dy <= r2:
+                sum_x[j] += cell_sx[key]
+                sum_y[j] += cell_sy[key]
+                cnt[j] += m
+                placed = True
+                break
+        if not placed:
+            sum_x[k] = cell_sx[key]
+            sum_y[k] = cell_sy[key]
+            cnt[k] = m
+            k += 1
+    centers = np.empty((k, 2), dtype=np.float32)
+    for j in range(k):
+        centers[j, 0] = sum_x[j] / cnt[j]
+        centers[j, 1] = sum_y[j] / cnt[j]
+    return centers, cnt[:k].copy()
+
+def _ingest_scans(scans, points, timeout):
+    """Esperar hasta 'timeout' s la próxima vuelta ya convertida del productor y agregarla al buffer.
+    Si hay varias encoladas se vacía la cola y las MAX_COALESCE_SCANS más recientes se juntan en
+    un lote con el timestamp de la última; las anteriores se descartan.
+    Devuelve True si llegaron datos."""
+    try:
+        t_scan, xy = scans.get(timeout=timeout)
+    except queue.Empty:
+        return False
+    batch = deque([xy], maxlen=MAX_COALESCE_SCANS)
+    while True:
+        try:
+            t_scan, xy = scans.get_nowait()
+        except queue.Empty:
+            break
+        batch.append(xy)
+    if len(batch) > 1:
+        xy = np.concatenate(batch)
+    points.extend(t_scan, xy)
+    return True
+
+def _scan_producer(lidar, scans, stop_event, scan_filter, fast_reader=True, stats=None):
+    """Hilo productor: drena el puerto serie, convierte cada vuelta a coordenadas del plot y
+    la encola como (timestamp, array (k, 2) float32). Así un frame lento de matplotlib no retrasa la lectura
+    serie ni deja que el buffer del adaptador USB acumule segundos de retraso, y la conversión
+    (NumPy / kernel Numba sin GIL) no le quita tiempo al hilo de la GUI.
+    scan_filter: (angle_min_deg, angle_max_deg, offset_x_m, offset_y_m, span_x, span_y).
+    fast_reader: usar iter_scans_fast en lugar de lidar.iter_scans (requiere acceso a pyserial).
+    stats: dict opcional con los contadores de resincronización de iter_scans_fast."""
+    if fast_reader and _serial_of(lidar) is None:
+        fast_reader = False
+    if stats is None:
+        stats = {}
+    # no-op si main() ya lo hizo mientras arrancaba el motor
+    _warmup_kernels()
+    # métodos usados en cada vuelta ligados a nombres locales (sin búsqueda de atributos por vuelta)
+    stopped = stop_event.is_set
+    monotonic = time.monotonic
+    put = scans.put
+    try:
+        while not stopped():
+            try:
+                if fast_reader:
+                    source = iter_scans_fast(lidar, stats=stats, stopped=stopped)
+                else:
+                    source = (_scan_list_to_array(scan) for scan in lidar.iter_scans())
+                for scan_arr in source:
+                    t_scan = monotonic()
+                    put((t_scan, _convert_scan(scan_arr, *scan_filter)))
+                    if stopped():
+                        break
+                time.sleep(0.01)
+            except RPLidarException as e:
+                msg = str(e)
+                if 'Wrong body size' in msg or 'wrong body size' in msg.lower():
+                    _flush_input(lidar)
+                    time.sleep(0.05)
+                    continue
+                print("RPLidarException en live scan:", e)
+                break
+            except OSError as e:  # serial.SerialException deriva de OSError (p.ej. sensor desconectado)
+                if not stopped():
+                    print("Error del puerto serie en live scan:", e)
+                break
+    finally:
+        # sin productor no hay datos nuevos: detener también el lazo de la GUI
+        stop_event.set()
+        if stats.get('resyncs'):
+            print(f"Resincronizaciones del flujo serie: {stats['resyncs']} "
+                  f"({stats['dropped_bytes']} bytes descartados)")
+
+def _run_live_loop(lidar, stop_event, scan_filter, draw, pump,
+                   buffer_max=POINT_BUFFER, point_ttl_s=1.0, max_fps=MAX_FPS, fast_reader=True,
+                   needs_redraw=None, prepare=None):
+    """Lazo común de las vistas en vivo: arranca el hilo productor, agrega sus vueltas a un
+    PointBuffer, limita los cuadros a max_fps y llama a draw(arr, now) con los puntos vigentes
+    cuando cambiaron. pump() atiende los eventos de la GUI en cada vuelta del lazo.
+    needs_redraw(now): opcional, True para redibujar aunque los puntos no hayan cambiado.
+    prepare(): opcional, se llama tras arrancar el productor y antes del lazo.
+    Al terminar (stop_event, Ctrl+C o error) detiene el productor; la limpieza de la vista y del
+    sensor queda a cargo de quien llama."""
+    points = PointBuffer(buffer_max)  # x, y del plot con timestamp por lote
+    frame_period = 1.0 / max_fps
+    last_draw = 0.0
+    pending = False  # hay vueltas acumuladas que aún no se dibujaron
+    last_state = None  # PointBuffer.state del último cuadro dibujado
+
+    # el puerto serie se drena en un hilo productor; este hilo (GUI) sólo consume y dibuja
+    scans = queue.SimpleQueue()
+    producer = threading.Thread(target=_scan_producer,
+                                args=(lidar, scans, stop_event, scan_filter, fast_reader),
+                                daemon=True)
+    producer.start()
+    if prepare is not None:
+        prepare()
+
+    # métodos usados en cada vuelta del lazo ligados a nombres locales
+    stopped = stop_event.is_set
+    monotonic = time.monotonic
+    try:
+        while not stopped():
+            # esperar la próxima vuelta sin bloquear la GUI: si hay datos sin dibujar, sólo hasta
+            # que toque el próximo cuadro; si no, como mucho un período de cuadro, así los eventos
+            # de la ventana (mover, redimensionar, cerrar) se atienden aunque el sensor no envíe datos
+            if pending:
+                timeout = max(0.0, last_draw + frame_period - monotonic())
+            else:
+                timeout = frame_period
+            if _ingest_scans(scans, points, timeout):
+                pending = True
+
+            # limitador de cuadros: sin sleeps, la lectura sigue a toda velocidad y sólo se
+            # dibuja cuando pasó frame_period desde el último cuadro
+            now = monotonic()
+            if now - last_draw < frame_period:
+                pump()
+                continue
+
+            # puntos vigentes según TTL; si el contenido no cambió (vuelta vacía, sensor tapado o
+            # sin datos) y la vista no pide otro cuadro, no se redibuja nada
+            arr = points.live(None if point_ttl_s is None else now - point_ttl_s)
+            pending = False
+            if points.state == last_state and not (needs_redraw is not None and needs_redraw(now)):
+                pump()
+                continue
+            last_state = points.state
+            last_draw = now
+            draw(arr, now)
+            pump()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        # ambos lectores revisan stop_event como mucho tras el timeout del puerto
+        producer.join(timeout=2.0)
+
+class BlitManager:
+    """Blitting de matplotlib: el fondo estático (grilla, ejes, leyenda) se cachea y cada cuadro
+    sólo restaura esa imagen y redibuja los artistas dinámicos (animated=True).
+    El fondo se recaptura en cada 'draw_event', es decir tras cualquier dibujo completo del canvas
+    (inicio, resize, zoom, cambio de DPI), así nunca queda desactualizado."""
+
+    def __init__(self, canvas, bbox, artists=()):
+        self.canvas = canvas
+        self.bbox = bbox
+        self._artists = []
+        self._extra = ()
+        self._background = None
+        for art in artists:
+            self.add_artist(art)
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add_artist(self, art):
+        """Registrar un artista dinámico fijo (se dibuja en todos los cuadros)."""
+        art.set_animated(True)
+        self._artists.append(art)
+
+    @property
+    def has_background(self):
+        return self._background is not None
+
+    def _on_draw(self, event):
+        # capturar el fondo recién dibujado y volver a pintar encima los artistas dinámicos,
+        # para que un redibujo disparado por la GUI (p.ej. un resize) no los borre hasta el próximo cuadro
+        self._background = self.canvas.copy_from_bbox(self.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        fig = self.canvas.figure
+        for art in self._artists:
+            fig.draw_artist(art)
+        for art in self._extra:
+            fig.draw_artist(art)
+
+    def capture(self):
+        """Dibujar el canvas completo una vez para capturar el fondo (vía draw_event)."""
+        self.canvas.draw()
+
+    def update(self, extra=()):
+        """Dibujar un cuadro: fondo cacheado + artistas fijos + 'extra' (artistas de este cuadro)."""
+        self._extra = extra
+        if self._background is None:
+            self.capture()
+        self.canvas.restore_region(self._background)
+        self._draw_animated()
+        self.canvas.blit(self.bbox)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._cid)
+        self._extra = ()
+
 def live_scan_and_plot(lidar, ax, stop_event,
                        panels_x=PANELS_X, panels_y=PANELS_Y,
                        panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS,
                        buffer_max=POINT_BUFFER,
-                       pause_s=0.02,
                        point_ttl_s=1.0,
                        angle_min_deg=0.0,
                        angle_max_deg=90.0,
                        origin_offset_panels_x=0, origin_offset_panels_y=0,
-                       enable_auto_click=False):
+                       enable_auto_click=False,
+                       max_fps=MAX_FPS,
+                       raw_mode='none',
+                       fast_reader=True,
+                       max_active=None):
     """
     Mostrar puntos en tiempo real usando la conexión 'lidar' ya abierta.
     origin_offset_panels_x/y: cantidad de paneles a desplazar la posición del RPLidar
     (se aplica sumando el offset en metros a cada punto leído).
     enable_auto_click: si es True, realiza clicks automáticos en los círculos verdes.
+    point_ttl_s: segundos que un punto sigue visible; None lo desactiva (sólo el tamaño del buffer
+    limita los puntos mostrados).
+    max_fps: tope de cuadros por segundo; las vueltas que llegan entre cuadros sólo se acumulan.
+    raw_mode: capa de puntos crudos vigentes debajo de los clusters: 'points' (un píxel por punto),
+    'density' (raster de ocupación por píxel de panel) o 'none'.
+    fast_reader: leer el puerto serie directamente y decodificar con NumPy (iter_scans_fast);
+    si es False se usa lidar.iter_scans() de la librería rplidar.
+    max_active: tope de puntos que entran al agrupamiento por cuadro (se submuestrea el resto);
+    None agrupa todos. Las capas de puntos crudos siempre muestran todos.
     """
     span_x = panels_x * panel_size
     span_y = panels_y * panel_size
 
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Circle
+
     # offset en metros
     offset_x_m = origin_offset_panels_x * panel_size
     offset_y_m = origin_offset_panels_y * panel_size
 
-    points = deque(maxlen=buffer_max)  # almacena (t, x_plot, y_plot)
-    scatter = ax.scatter([], [], s=20, c='red', linewidths=0)
-
-    # etiquetas de texto para cada centro (se reemplazan en cada frame)
-    label_texts = []
-
-    def _cluster_points(points_arr, radius):
-        """Agrupa puntos por distancia (algoritmo greedy): devuelve centros y cuentas."""
-        if points_arr.size == 0:
-            return np.empty((0, 2)), np.empty((0,), dtype=int)
-        clusters = []  # cada cluster: [sum_x, sum_y, count]
-        r2 = radius * radius
-        for x, y in points_arr:
-            placed = False
-            for c in clusters:
-                cx = c[0] / c[2]
-                cy = c[1] / c[2]
-                if (x - cx) * (x - cx) + (y - cy) * (y - cy) <= r2:
-                    c[0] += x
-                    c[1] += y
-                    c[2] += 1
-                    placed = True
-                    break
-            if not placed:
-                clusters.append([x, y, 1])
-        centers = np.array([[c[0] / c[2], c[1] / c[2]] for c in clusters])
-        counts = np.array([c[2] for c in clusters], dtype=int)
-        return centers, counts
-
-    CLUSTER_RADIUS_M = 0.20  # 20 cm (agrupamiento)
+    # artistas dinámicos 'animated': no forman parte del fondo y se dibujan con blitting
+    scatter = ax.scatter([], [], s=20, c='red', linewidths=0, animated=True)
+    # capa opcional de puntos crudos: un Line2D con marker ',' (un píxel por punto) es mucho más
+    # barato que un PathCollection; los clusters siguen en scatter porque usan tamaños por punto
+    raw_line = None
+    if raw_mode == 'points':
+        raw_line, = ax.plot([], [], linestyle='None', marker=',', color='tomato', zorder=8, animated=True)
+    # con muchos puntos conviene rasterizarlos: un histograma 2D con un bin por píxel de panel
+    # se dibuja como una sola imagen, con costo O(píxeles) sin importar la cantidad de puntos
+    raw_image = None
+    raw_density = None  # conteos por píxel con estela: las celdas que se vacían se apagan a la mitad por cuadro
+    raw_fading = False  # quedan celdas apagándose: hay que seguir dibujando aunque no cambien los puntos
+    if raw_mode == 'density':
+        raw_shape = (panels_y * panel_pixels, panels_x * panel_pixels)
+        raw_px_per_m = np.float32(panel_pixels / panel_size)
+        raw_density = np.zeros(raw_shape, dtype=np.uint16)
+        # celdas vacías (< vmin) transparentes para que se vea la grilla del fondo
+        raw_cmap = plt.get_cmap('Reds').with_extremes(under=(0.0, 0.0, 0.0, 0.0))
+        raw_image = ax.imshow(raw_density, extent=(0.0, span_x, span_y, 0.0),
+                              cmap=raw_cmap, vmin=0.5, vmax=5, interpolation='nearest',
+                              zorder=8, animated=True)
+
+    # fondo estático (grilla, ejes, leyenda) cacheado para blitting; se recaptura tras cada dibujo completo
+    canvas = ax.figure.canvas
+    blit = BlitManager(canvas, ax.bbox, [a for a in (raw_line, raw_image, scatter) if a is not None])
+    # cerrar la ventana termina el bucle (también para quien llame a esta función directamente)
+    close_cid = canvas.mpl_connect('close_event', lambda event: stop_event.set())
+
+    # etiquetas de texto para cada centro: pool de Text persistentes que se reubican en cada
+    # frame; las primeras labels_shown están visibles, el resto ocultas
+    label_pool = []
+    labels_shown = 0
+
     MOVEMENT_DETECT_DIST = 0.01  # 1 cm -> umbral para considerar que cambió de posición
     RADIO_MOVIMIENTO = 0.05  # 5 cm círculo verde
     MOVEMENT_CIRCLE_TTL = 0.6  # segundos que permanece el círculo
 
     prev_centers = None
-    movement_patches = []  # lista de (Circle patch, expire_time)
+    # círculos de movimiento y su vencimiento, en listas paralelas: como todos duran lo mismo se
+    # agregan en orden de vencimiento y los vencidos son siempre un prefijo (se ubica con bisect)
+    movement_patches = []
+    movement_expiry = []
+    # círculos vencidos, ocultos y listos para reutilizar (mismo criterio que label_pool)
+    circle_pool = []
 
     # offset para posicionar la etiqueta ligeramente por encima del punto (en metros)
     LABEL_OFFSET_M = 0.02
+    # invariantes de las etiquetas, calculados una vez fuera del lazo: el sentido del eje Y no
+    # cambia durante el escaneo (el zoom de la barra de herramientas lo conserva)
+    y0, y1 = ax.get_ylim()
+    label_dy = LABEL_OFFSET_M if y0 < y1 else -LABEL_OFFSET_M
+    label_va = 'bottom' if y0 < y1 else 'top'
+    total_pixels_x = panels_x * panel_pixels
+    total_pixels_y = panels_y * panel_pixels
 
-    try:
-        while not stop_event.is_set():
-            try:
-                for scan in lidar.iter_scans():
-                    if stop_event.is_set():
-                        break
-                    now = time.monotonic()
-                    for (_, angle_deg, dist_mm) in scan:
-                        if stop_event.is_set():
-                            break
-                        # filtrar por ángulo solicitado
-                        if not (angle_min_deg <= angle_deg <= angle_max_deg):
-                            continue
-                        if dist_mm == 0:
-                            continue
-                        r = dist_mm / 1000.0  # metros
-                        theta = math.radians(angle_deg)
-                        # coordenadas relativas al sensor
-                        x_rel = r * math.cos(theta)
-                        y_rel = r * math.sin(theta)
-                        # convertir a coordenadas del plot (sumando offset del sensor)
-                        x = x_rel + offset_x_m
-                        y = y_rel + offset_y_m
-                        # conservar solo puntos dentro del cuadrante positivo [0, span]
-                        if 0.0 <= x <= span_x and 0.0 <= y <= span_y:
-                            points.append((now, x, y))
-
-                    # purgar por TTL
-                    cutoff = now - point_ttl_s
-                    while points and points[0][0] < cutoff:
-                        points.popleft()
-
-                    # remover patches expirados
-                    new_movement_patches = []
-                    for p, exp in movement_patches:
-                        if now >= exp:
-                            try:
-                                p.remove()
-                            except Exception:
-                                pass
-                        else:
-                            new_movement_patches.append((p, exp))
-                    movement_patches = new_movement_patches
-
-                    # remover etiquetas antiguas (será reemplazadas por las nuevas)
-                    for t in label_texts:
-                        try:
-                            t.remove()
-                        except Exception:
-                            pass
-                    label_texts = []
-
-                    if points:
-                        arr = np.asarray([(px, py) for (_, px, py) in points])
-                        centers, counts = _cluster_points(arr, CLUSTER_RADIUS_M)
-                        if centers.size:
-                            scatter.set_offsets(centers)
-                            # escalar tamaño por cantidad de puntos en el cluster (visual)
-                            sizes = np.clip(8 + counts * 6, 8, 200)
-                            scatter.set_sizes(sizes)
-
-                            # crear etiquetas sobre cada centro con coordenadas en píxeles
-                            total_pixels_x = panels_x * panel_pixels
-                            total_pixels_y = panels_y * panel_pixels
-                            for c in centers:
-                                # calcular posición de la etiqueta según inversión de Y del eje
-                                y0, y1 = ax.get_ylim()
-                                if y0 < y1:
-                                    label_y = c[1] + LABEL_OFFSET_M
-                                else:
-                                    label_y = c[1] - LABEL_OFFSET_M
-
-                                # convertir coordenadas en metros a píxeles (origen top-left)
-                                px = int(math.floor((c[0] / panel_size) * panel_pixels))
-                                py = int(math.floor((c[1] / panel_size) * panel_pixels))
-                                # asegurar rango válido
-                                px = max(0, min(px, total_pixels_x - 1))
-                                py = max(0, min(py, total_pixels_y - 1))
-
-                                txt = ax.text(c[0], label_y,
-                                              f"({px},{py})",
-                                              fontsize=7, color='black', zorder=20,
-                                              ha='center', va='bottom' if y0 < y1 else 'top')
-                                label_texts.append(txt)
-
-                            # detectar movimientos comparando con prev_centers
-                            if prev_centers is None or prev_centers.size == 0:
-                                # primera vez: no marcar movimientos, sólo guardar
-                                prev_centers = centers.copy()
-                            else:
-                                # para cada centro actual encontrar el prev más cercano
-                                for c in centers:
-                                    # calcular distancias a prev_centers
-                                    dists = np.sum((prev_centers - c) ** 2, axis=1)
-                                    idx = np.argmin(dists)
-                                    dist = math.sqrt(dists[idx])
-                                    if dist >= MOVEMENT_DETECT_DIST:
-                                        # crear círculo verde en la posición nueva
-                                        circ = Circle((c[0], c[1]), RADIO_MOVIMIENTO,
-                                                      edgecolor='green', facecolor='none',
-                                                      linewidth=1.5, zorder=12)
-                                        ax.add_patch(circ)
-                                        movement_patches.append((circ, now + MOVEMENT_CIRCLE_TTL))
-                                        
-                                        # Realizar click automático si está habilitado
-                                        if enable_auto_click:
-                                            # Convertir coordenadas del gráfico a coordenadas de pantalla
-                                            try:
-                                                # Obtener transformación de datos a píxeles de pantalla
-                                                transform = ax.transData.transform
-                                                screen_coords = transform((c[0], c[1]))
-                                                
-                                                # Obtener posición de la figura en pantalla
-                                                fig_manager = plt.get_current_fig_manager()
-                                                if hasattr(fig_manager, 'window'):
-                                                    window = fig_manager.window
-                                                    if hasattr(window, 'winfo_x') and hasattr(window, 'winfo_y'):
-                                                        # Para backend TkAgg
-                                                        fig_x = window.winfo_x()
-                                                        fig_y = window.winfo_y()
-                                                        fig_width = window.winfo_width()
-                                                        fig_height = window.winfo_height()
-                                                        
-                                                        # Calcular posición absoluta en pantalla
-                                                        screen_x = fig_x + screen_coords[0]
-                                                        screen_y = fig_y + fig_height - screen_coords[1]  # Invertir Y
-                                                        
-                                                        # Realizar click usando ctypes
-                                                        ctypes.windll.user32.SetCursorPos(int(screen_x), int(screen_y))
-                                                        ctypes.windll.user32.mouse_event(2, 0, 0, 0, 0)  # MOUSEEVENTF_LEFTDOWN
-                                                        ctypes.windll.user32.mouse_event(4, 0, 0, 0, 0)  # MOUSEEVENTF_LEFTUP
-                                                        
-                                                        print(f"Click automático en ({int(screen_x)}, {int(screen_y)}) - Centro: ({c[0]:.3f}, {c[1]:.3f}) m")
-                                            except Exception as e:
-                                                print(f"Error al realizar click automático: {e}")
-                                        
-                                prev_centers = centers.copy()
-                        else:
-                            scatter.set_offsets(np.empty((0, 2)))
-                            scatter.set_sizes([])
-                            prev_centers = None
-                    else:
-                        scatter.set_offsets(np.empty((0, 2)))
-                        scatter.set_sizes([])
-                        prev_centers = None
-
-                    try:
-                        ax.figure.canvas.draw_idle()
-                    except Exception:
-                        pass
-                    plt.pause(pause_s)
+    def needs_redraw(now):
+        # redibujar aunque los puntos no cambien: falta el fondo, hay celdas del raster
+        # apagándose o venció algún círculo de movimiento
+        return (not blit.has_background or raw_fading
+                or bool(movement_expiry and movement_expiry[0] <= now))
 
-                time.sleep(0.01)
+    def draw(arr, now):
+        nonlocal raw_fading, prev_centers, labels_shown
+        # ocultar y devolver al pool los círculos expirados (sólo se recorren los vencidos)
+        expired = bisect_right(movement_expiry, now)
+        if expired:
+            for p in movement_patches[:expired]:
+                p.set_visible(False)
+            circle_pool.extend(movement_patches[:expired])
+            del movement_patches[:expired]
+            del movement_expiry[:expired]
 
-            except RPLidarException as e:
-                msg = str(e)
-                if 'Wrong body size' in msg or 'wrong body size' in msg.lower():
-                    ser = getattr(lidar, '_serial', None)
-                    if ser is not None:
-                        try:
-                            ser.reset_input_buffer()
-                        except AttributeError:
-                            try:
-                                ser.flushInput()
-                            except:
-                                pass
-                    time.sleep(0.05)
-                    continue
+        n_labels = 0  # etiquetas usadas en este frame
+
+        if raw_line is not None:
+            raw_line.set_data(arr[:, 0], arr[:, 1])
+        if raw_image is not None:
+            raw_fading = _rasterize(raw_density, arr, raw_px_per_m)
+            raw_image.set_data(raw_density)
+        if len(arr):
+            centers, counts = _cluster_points(arr, CLUSTER_RADIUS_M, max_active)
+            if centers.size:
+                scatter.set_offsets(centers)
+                # escalar tamaño por cantidad de puntos en el cluster (visual)
+                sizes = np.clip(8 + counts * 6, 8, 200)
+                scatter.set_sizes(sizes)
+
+                # convertir los centros de metros a píxeles (origen top-left) de una vez,
+                # asegurando rango válido
+                pix = np.floor(centers * np.float32(panel_pixels / panel_size)).astype(np.int32)
+                np.clip(pix[:, 0], 0, total_pixels_x - 1, out=pix[:, 0])
+                np.clip(pix[:, 1], 0, total_pixels_y - 1, out=pix[:, 1])
+                # ubicar etiquetas sobre cada centro con coordenadas en píxeles
+                for (cx, cy), (px, py) in zip(centers.tolist(), pix.tolist()):
+                    if n_labels == len(label_pool):
+                        label_pool.append(ax.text(0.0, 0.0, "", fontsize=7, color='black',
+                                                  zorder=20, ha='center', va=label_va,
+                                                  animated=True))
+                    txt = label_pool[n_labels]
+                    # ligeramente por encima del punto en pantalla (según inversión de Y del eje)
+                    txt.set_position((cx, cy + label_dy))
+                    txt.set_text(f"({px},{py})")
+                    txt.set_visible(True)
+                    n_labels += 1
+
+                # detectar movimientos comparando con prev_centers
+                if prev_centers is None or prev_centers.size == 0:
+                    # primera vez: no marcar movimientos, sólo guardar
+                    prev_centers = centers.copy()
                 else:
-                    print("RPLidarException en live scan:", e)
-                    stop_event.set()
-                    break
+                    # para cada centro actual, distancia al prev más cercano (en un solo paso)
+                    moved = _nearest_distances(prev_centers, centers) >= MOVEMENT_DETECT_DIST
+                    for c in centers[moved]:
+                        # círculo verde en la posición nueva (reutilizando uno vencido si hay)
+                        if circle_pool:
+                            circ = circle_pool.pop()
+                            circ.set_center((c[0], c[1]))
+                            circ.set_visible(True)
+                        else:
+                            circ = Circle((c[0], c[1]), RADIO_MOVIMIENTO,
+                                          edgecolor='green', facecolor='none',
+                                          linewidth=1.5, zorder=12, animated=True)
+                            ax.add_patch(circ)
+                        movement_patches.append(circ)
+                        movement_expiry.append(now + MOVEMENT_CIRCLE_TTL)
 
-    except KeyboardInterrupt:
-        stop_event.set()
+                        # Realizar click automático si está habilitado
+                        if enable_auto_click:
+                            # Convertir coordenadas del gráfico a coordenadas de pantalla
+                            try:
+                                # Obtener transformación de datos a píxeles de pantalla
+                                transform = ax.transData.transform
+                                screen_coords = transform((c[0], c[1]))
+
+                                # Obtener posición de la figura en pantalla
+                                fig_manager = plt.get_current_fig_manager()
+                                if hasattr(fig_manager, 'window'):
+                                    window = fig_manager.window
+                                    if hasattr(window, 'winfo_x') and hasattr(window, 'winfo_y'):
+                                        # Para backend TkAgg
+                                        fig_x = window.winfo_x()
+                                        fig_y = window.winfo_y()
+                                        fig_width = window.winfo_width()
+                                        fig_height = window.winfo_height()
+
+                                        # Calcular posición absoluta en pantalla
+                                        screen_x = fig_x + screen_coords[0]
+                                        screen_y = fig_y + fig_height - screen_coords[1]  # Invertir Y
+
+                                        # Realizar click usando ctypes
+                                        ctypes.windll.user32.SetCursorPos(int(screen_x), int(screen_y))
+                                        ctypes.windll.user32.mouse_event(2, 0, 0, 0, 0)  # MOUSEEVENTF_LEFTDOWN
+                                        ctypes.windll.user32.mouse_event(4, 0, 0, 0, 0)  # MOUSEEVENTF_LEFTUP
+
+                                        print(f"Click automático en ({int(screen_x)}, {int(screen_y)}) - Centro: ({c[0]:.3f}, {c[1]:.3f}) m")
+                            except Exception as e:
+                                print(f"Error al realizar click automático: {e}")
+
+                    prev_centers = centers.copy()
+            else:
+                scatter.set_offsets(_EMPTY_XY)
+                scatter.set_sizes([])
+                prev_centers = None
+        else:
+            scatter.set_offsets(_EMPTY_XY)
+            scatter.set_sizes([])
+            prev_centers = None
+
+        # ocultar las etiquetas que sobraron respecto del frame anterior
+        for t in label_pool[n_labels:labels_shown]:
+            t.set_visible(False)
+        labels_shown = n_labels
+
+        # blitting: restaurar el fondo cacheado y redibujar sólo los artistas dinámicos
+        blit.update(movement_patches + label_pool[:labels_shown])
+
+    scan_filter = (angle_min_deg, angle_max_deg, offset_x_m, offset_y_m, span_x, span_y)
+    try:
+        # prepare: primer dibujo completo mientras llega la primera vuelta, así el primer cuadro
+        # ya es un blit
+        _run_live_loop(lidar, stop_event, scan_filter, draw, canvas.flush_events,
+                       buffer_max=buffer_max, point_ttl_s=point_ttl_s, max_fps=max_fps,
+                       fast_reader=fast_reader, needs_redraw=needs_redraw, prepare=blit.capture)
     finally:
+        blit.disconnect()
+        canvas.mpl_disconnect(close_cid)
         # limpiar patches y etiquetas
-        for p, _ in movement_patches:
+        for p in movement_patches + circle_pool:
             try:
                 p.remove()
-            except:
+            except Exception:
                 pass
-        for t in label_texts:
+        for t in label_pool:
             try:
                 t.remove()
-            except:
+            except Exception:
                 pass
-        try:
-            lidar.stop()
-        except:
-            pass
-        try:
-            lidar.stop_motor()
-        except:
-            pass
-        try:
-            lidar.disconnect()
-        except:
-            pass
+        _safe_shutdown(lidar)
+
+def live_scan_gl(lidar, stop_event,
+                 panels_x=PANELS_X, panels_y=PANELS_Y,
+                 panel_size=PANEL_SIZE_M,
+                 buffer_max=POINT_BUFFER,
+                 point_ttl_s=1.0,
+                 angle_min_deg=0.0,
+                 angle_max_deg=90.0,
+                 origin_offset_panels_x=0, origin_offset_panels_y=0,
+                 max_fps=MAX_FPS,
+                 fast_reader=True,
+                 max_active=None):
+    """
+    Variante de live_scan_and_plot que dibuja con OpenGL (vispy) en lugar de matplotlib.
+    Puntos crudos y centros de cluster son Markers: cada cuadro sube los arrays a la GPU y las
+    transformaciones se hacen en el shader, así el hilo principal queda libre para drenar datos.
+    No incluye etiquetas de píxel, círculos de movimiento ni clicks automáticos.
+    Requiere: pip install vispy (y un backend GUI, p.ej. PyQt5).
+    """
+    from vispy import app, scene
+
+    span_x = panels_x * panel_size
+    span_y = panels_y * panel_size
+    offset_x_m = origin_offset_panels_x * panel_size
+    offset_y_m = origin_offset_panels_y * panel_size
+
+    canvas = scene.SceneCanvas(title='RPLidar (GL) - origen en esquina superior izquierda (0,0)',
+                               keys='interactive', bgcolor='white', show=True)
+    view = canvas.central_widget.add_view()
+    view.camera = scene.PanZoomCamera(rect=(0.0, 0.0, span_x, span_y), aspect=1)
+    view.camera.flip = (False, True, False)  # invertir Y para que 0 esté arriba
+    scene.visuals.GridLines(scale=(panel_size, panel_size), color='gray', parent=view.scene)
+    sensor = scene.visuals.Markers(parent=view.scene)
+    sensor.set_data(np.array([[offset_x_m, offset_y_m]], dtype=np.float32), size=10,
+                    face_color='blue', edge_width=0)
+    raw_markers = scene.visuals.Markers(parent=view.scene)
+    center_markers = scene.visuals.Markers(parent=view.scene)
+    # cerrar la ventana dispara el evento de parada
+    canvas.events.close.connect(lambda event: stop_event.set())
+
+    def draw(arr, now):
+        raw_markers.set_data(arr, size=2, face_color='tomato', edge_width=0)
+        centers, counts = _cluster_points(arr, CLUSTER_RADIUS_M, max_active)
+        center_markers.set_data(centers, size=np.clip(3 + counts * 0.5, 3, 14),
+                                face_color='red', edge_width=0)
+        canvas.update()
+
+    scan_filter = (angle_min_deg, angle_max_deg, offset_x_m, offset_y_m, span_x, span_y)
+    try:
+        _run_live_loop(lidar, stop_event, scan_filter, draw, app.process_events,
+                       buffer_max=buffer_max, point_ttl_s=point_ttl_s, max_fps=max_fps,
+                       fast_reader=fast_reader)
+    finally:
+        canvas.close()
+        _safe_shutdown(lidar)
+
+def live_scan_pg(lidar, stop_event,
+                 panels_x=PANELS_X, panels_y=PANELS_Y,
+                 panel_size=PANEL_SIZE_M,
+                 buffer_max=POINT_BUFFER,
+                 point_ttl_s=1.0,
+                 angle_min_deg=0.0,
+                 angle_max_deg=90.0,
+                 origin_offset_panels_x=0, origin_offset_panels_y=0,
+                 max_fps=MAX_FPS,
+                 fast_reader=True,
+                 max_active=None):
+    """
+    Variante de live_scan_and_plot que dibuja con pyqtgraph (Qt) en lugar de matplotlib.
+    Puntos crudos y centros de cluster son ScatterPlotItem: setData reemplaza los arrays y Qt
+    repinta sólo esos ítems, sin re-rasterizar ejes ni grilla en cada cuadro.
+    No incluye etiquetas de píxel, círculos de movimiento ni clicks automáticos.
+    Requiere: pip install pyqtgraph (y un binding Qt, p.ej. PyQt5).
+    """
+    import pyqtgraph as pg
+
+    span_x = panels_x * panel_size
+    span_y = panels_y * panel_size
+    offset_x_m = origin_offset_panels_x * panel_size
+    offset_y_m = origin_offset_panels_y * panel_size
+
+    app = pg.mkQApp()
+    win = pg.GraphicsLayoutWidget(show=True,
+                                  title='RPLidar (pyqtgraph) - origen en esquina superior izquierda (0,0)')
+    win.setBackground('w')
+    plot = win.addPlot()
+    plot.setAspectLocked(True)
+    plot.invertY(True)  # 0 arriba, igual que en matplotlib
+    plot.setXRange(0.0, span_x, padding=0)
+    plot.setYRange(0.0, span_y, padding=0)
+    plot.setLabel('bottom', 'X (m)')
+    plot.setLabel('left', 'Y (m)')
+    for axis in ('bottom', 'left'):
+        plot.getAxis(axis).setTickSpacing(major=panel_size, minor=panel_size / 8)
+    plot.showGrid(x=True, y=True, alpha=0.3)
+    plot.addItem(pg.ScatterPlotItem(pos=np.array([[offset_x_m, offset_y_m]], dtype=np.float32),
+                                    size=10, pen=None, brush='b'))
+    raw_scatter = pg.ScatterPlotItem(size=2, pen=None, brush=pg.mkBrush('#ff6347'))
+    center_scatter = pg.ScatterPlotItem(pen=None, brush='r')
+    plot.addItem(raw_scatter)
+    plot.addItem(center_scatter)
+
+    def draw(arr, now):
+        raw_scatter.setData(pos=arr)
+        centers, counts = _cluster_points(arr, CLUSTER_RADIUS_M, max_active)
+        center_scatter.setData(pos=centers, size=np.clip(3 + counts * 0.5, 3, 14))
+
+    def pump():
+        app.processEvents()
+        # cerrar la ventana termina el bucle
+        if not win.isVisible():
+            stop_event.set()
+
+    scan_filter = (angle_min_deg, angle_max_deg, offset_x_m, offset_y_m, span_x, span_y)
+    try:
+        _run_live_loop(lidar, stop_event, scan_filter, draw, pump,
+                       buffer_max=buffer_max, point_ttl_s=point_ttl_s, max_fps=max_fps,
+                       fast_reader=fast_reader)
+    finally:
+        win.close()
+        _safe_shutdown(lidar)
 
 def prompt_action():
     try:
@@ -455,6 +1325,37 @@ def prompt_action():
         print()
         return 'exit'
 
+def interactive_session(port, baud):
+    """Pedir acciones por terminal hasta 'scan' o 'exit'.
+    on/off/status comparten una única conexión, abierta en la primera acción: se evita reabrir
+    el puerto y la espera de estabilización de connect() en cada comando.
+    Devuelve la acción final ('scan' o 'exit')."""
+    lidar = None
+    try:
+        while True:
+            action = prompt_action()
+            if action in ('scan', 'exit', 'quit'):
+                return 'scan' if action == 'scan' else 'exit'
+            if lidar is None:
+                try:
+                    lidar = connect(port, baud)
+                except RPLidarException as e:
+                    print("Error al conectar:", e)
+                    continue
+            if action == 'on':
+                do_on(port, baud, lidar)
+            elif action == 'off':
+                do_off(port, baud, lidar)
+            else:
+                do_status(port, baud, lidar)
+    finally:
+        # el escaneo abre su propia conexión (y la cierra al terminar)
+        if lidar:
+            try:
+                lidar.disconnect()
+            except Exception:
+                pass
+
 def prompt_auto_click():
     """Pregunta al usuario si desea habilitar los clicks automáticos."""
     try:
@@ -472,7 +1373,7 @@ def prompt_auto_click():
 
 def main():
     p = argparse.ArgumentParser(description="Control simple RPLidar A2M12 (COM3, 256000).")
-    p.add_argument("action", nargs='?', choices=['on','off','status','scan'], help="acción a ejecutar (opcional).")
+    p.add_argument("action", nargs='?', choices=['on','off','status','scan','compile'], help="acción a ejecutar (opcional).")
     p.add_argument("--port", default=PORT, help="Puerto serie (por defecto COM3).")
     p.add_argument("--baud", type=int, default=BAUD, help="Baudios (por defecto 256000).")
     p.add_argument("--panels-x", type=int, default=PANELS_X, help="Cantidad de paneles en X.")
@@ -480,7 +1381,37 @@ def main():
     p.add_argument("--origin-offset-x", type=int, default=0, help="Offset de origen en paneles (X).")
     p.add_argument("--origin-offset-y", type=int, default=0, help="Offset de origen en paneles (Y).")
     p.add_argument("--buffer", type=int, default=POINT_BUFFER, help="Buffer máximo de puntos.")
+    p.add_argument("--fine-grid", action='store_true', help="Dibujar la grilla menor por píxel (más lenta).")
+    p.add_argument("--raw", choices=['none', 'points', 'density'], default='none',
+                   help="Mostrar también los puntos crudos debajo de los clusters "
+                        "('density': raster por píxel, recomendado con buffers grandes).")
+    p.add_argument("--reader", choices=['fast', 'rplidar'], default='fast',
+                   help="Lectura de escaneos: 'fast' decodifica el puerto serie con NumPy, "
+                        "'rplidar' usa iter_scans() de la librería.")
+    p.add_argument("--max-active", type=int, default=0,
+                   help="Máximo de puntos agrupados por cuadro; con más se submuestrea "
+                        "(por defecto 0 = sin límite).")
+    p.add_argument("--ttl", type=float, default=1.0,
+                   help="Segundos que un punto sigue visible (por defecto 1.0; 0 = sin vencimiento).")
+    p.add_argument("--fps", type=float, default=MAX_FPS,
+                   help="Cuadros por segundo máximos del gráfico (por defecto 30).")
+    p.add_argument("--backend", choices=['matplotlib', 'gl', 'pyqtgraph'], default=None,
+                   help="Biblioteca de dibujo (por defecto matplotlib; 'gl' = vispy/OpenGL); gl y "
+                        "pyqtgraph son más rápidas pero no tienen etiquetas ni clicks automáticos.")
+    p.add_argument("--gl", action='store_true', help="Alias de --backend gl.")
     args = p.parse_args()
+    if args.gl:
+        if args.backend not in (None, 'gl'):
+            p.error("--gl no se puede combinar con --backend %s" % args.backend)
+        args.backend = 'gl'
+    elif args.backend is None:
+        args.backend = 'matplotlib'
+    if args.fps <= 0:
+        p.error("--fps debe ser mayor que 0")
+    if args.buffer < 1:
+        p.error("--buffer debe ser mayor o igual a 1")
+    point_ttl_s = args.ttl if args.ttl > 0 else None
+    max_active = args.max_active if args.max_active > 0 else None
 
     action = args.action
 
@@ -494,9 +1425,16 @@ def main():
     elif action == 'status':
         do_status(args.port, args.baud)
         return
+    elif action == 'compile':
+        do_compile()
+        return
+    elif action is None:
+        # sin acción: modo interactivo (solicita acciones en terminal)
+        if interactive_session(args.port, args.baud) != 'scan':
+            return
 
-    # Prompt para habilitar clicks automáticos
-    enable_auto_click = prompt_auto_click()
+    # Prompt para habilitar clicks automáticos (sólo en la vista matplotlib)
+    enable_auto_click = prompt_auto_click() if args.backend == 'matplotlib' else False
 
     # Prompt para especificar cantidad de paneles en X antes de iniciar el programa
     try:
@@ -590,28 +1528,47 @@ def main():
         print()
         return
 
-    # Crear gráfico con ejes X,Y usando los valores provistos por prompt
-    fig, ax = init_plot(panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS,
-                        panels_x=panels_x, panels_y=panels_y,
-                        origin_offset_panels_x=origin_offset_x, origin_offset_panels_y=origin_offset_y)
-
     # Por defecto: iniciar RPLidar y mostrar escaneo en vivo.
     stop_event = threading.Event()
-    # cerrar la ventana activa dispara el evento de parada
-    fig.canvas.mpl_connect('close_event', lambda event: stop_event.set())
+
+    if args.backend == 'matplotlib':
+        # Crear gráfico con ejes X,Y usando los valores provistos por prompt
+        fig, ax = init_plot(panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS,
+                            panels_x=panels_x, panels_y=panels_y,
+                            origin_offset_panels_x=origin_offset_x, origin_offset_panels_y=origin_offset_y,
+                            fine_grid=args.fine_grid)
 
     lidar = None
     try:
         lidar = connect(args.port, args.baud)
         lidar.start_motor()
+        # compilar mientras el motor acelera
+        _warmup_kernels()
         print("Motor arrancado. Cerrar la ventana o presionar Ctrl+C para detener.")
-        # ejecutar escaneo en el hilo principal (permite procesar eventos GUI con plt.pause)
-        live_scan_and_plot(lidar, ax, stop_event,
-                           panels_x=panels_x, panels_y=panels_y,
-                           panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS,
-                           buffer_max=args.buffer,
-                           origin_offset_panels_x=origin_offset_x, origin_offset_panels_y=origin_offset_y,
-                           enable_auto_click=enable_auto_click)
+        # dibujar en el hilo principal (procesa eventos GUI); la lectura serie va en un hilo aparte
+        if args.backend != 'matplotlib':
+            live_scan = live_scan_gl if args.backend == 'gl' else live_scan_pg
+            live_scan(lidar, stop_event,
+                      panels_x=panels_x, panels_y=panels_y,
+                      panel_size=PANEL_SIZE_M,
+                      buffer_max=args.buffer,
+                      origin_offset_panels_x=origin_offset_x, origin_offset_panels_y=origin_offset_y,
+                      point_ttl_s=point_ttl_s,
+                      max_fps=args.fps,
+                      fast_reader=(args.reader == 'fast'),
+                      max_active=max_active)
+        else:
+            live_scan_and_plot(lidar, ax, stop_event,
+                               panels_x=panels_x, panels_y=panels_y,
+                               panel_size=PANEL_SIZE_M, panel_pixels=PANEL_PIXELS,
+                               buffer_max=args.buffer,
+                               origin_offset_panels_x=origin_offset_x, origin_offset_panels_y=origin_offset_y,
+                               enable_auto_click=enable_auto_click,
+                               point_ttl_s=point_ttl_s,
+                               max_fps=args.fps,
+                               raw_mode=args.raw,
+                               fast_reader=(args.reader == 'fast'),
+                               max_active=max_active)
     except RPLidarException as e:
         print("Error inicializando RPLidar:", e)
     except KeyboardInterrupt:
@@ -619,18 +1576,7 @@ def main():
     finally:
         # por si algo quedó abierto (live_scan ya intenta limpiar)
         if lidar:
-            try:
-                lidar.stop()
-            except:
-                pass
-            try:
-                lidar.stop_motor()
-            except:
-                pass
-            try:
-                lidar.disconnect()
-            except:
-                pass
+            _safe_shutdown(lidar)
         print("Programa finalizado.")
 
 if __name__ == '__main__':